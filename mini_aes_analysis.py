@@ -0,0 +1,200 @@
+"""
+Differential, linear and avalanche analysis of Mini-AES.
+
+The S-box tables (DDT and LAT) are computed directly from MiniAES.S_BOX.
+The full-cipher statistics use the batch API: under one key the whole
+cipher is a 65,536-entry codebook, so every plaintext and every one-bit
+flip can be evaluated with a few array operations per key. Keys are
+independent and can be spread across a process pool.
+
+    python mini_aes_analysis.py --keys 64 --workers 4
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from mini_aes import MiniAES, block_to_int, encrypt_blocks, key_to_int
+
+# Every possible 16-bit block
+ALL_BLOCKS = np.arange(1 << 16, dtype=np.uint16)
+
+# Number of set bits of every 16-bit value
+POPCOUNT16 = np.unpackbits(ALL_BLOCKS.astype('>u2').view(np.uint8)).reshape(-1, 16).sum(axis=1).astype(np.uint8)
+
+
+def difference_distribution_table(s_box=None):
+    """
+    Difference distribution table of a 4-bit S-box: ddt[dx][dy] is the
+    number of inputs x with S(x) ^ S(x ^ dx) == dy
+    """
+    s_box = np.array(MiniAES.S_BOX if s_box is None else s_box)
+    x = np.arange(16)
+    dx = x[:, None]
+    dy = s_box[x] ^ s_box[x ^ dx]
+    ddt = np.zeros((16, 16), dtype=np.int64)
+    np.add.at(ddt, (np.broadcast_to(dx, dy.shape), dy), 1)
+    return ddt
+
+
+def linear_approximation_table(s_box=None):
+    """
+    Linear approximation table of a 4-bit S-box: lat[a][b] is the number of
+    inputs x with parity(a & x) == parity(b & S(x)), minus 8 (the bias
+    times 16)
+    """
+    s_box = np.array(MiniAES.S_BOX if s_box is None else s_box)
+    x = np.arange(16)
+    masks = np.arange(16)
+    input_parity = POPCOUNT16[masks[:, None] & x] & 1           # [a][x]
+    output_parity = POPCOUNT16[masks[:, None] & s_box[x]] & 1    # [b][x]
+    agree = input_parity[:, None, :] == output_parity[None, :, :]
+    return agree.sum(axis=2) - 8
+
+
+def bit_flip_counts(differences):
+    """
+    Count, for every output bit (bit 0 is the least significant), how many
+    of the 16-bit differences have that bit set
+    """
+    bits = np.unpackbits(differences.astype('>u2').view(np.uint8)).reshape(-1, 16)
+    return bits.sum(axis=0)[::-1]
+
+
+def cipher_differential(key, input_difference):
+    """
+    Output difference histogram of the full cipher under one key: entry dy
+    counts the plaintexts x with E(x) ^ E(x ^ dx) == dy, over all 65,536 x
+    """
+    codebook = encrypt_blocks(ALL_BLOCKS, key)
+    differences = codebook ^ codebook[ALL_BLOCKS ^ np.uint16(block_to_int(input_difference))]
+    return np.bincount(differences, minlength=1 << 16)
+
+
+def key_statistics(key):
+    """
+    Avalanche and differential statistics for one key over all plaintexts:
+    flip counts [input bit][output bit] for plaintext bit flips and for key
+    bit flips, and the highest count of any (dx, dy) pair over the
+    single-bit input differences
+    """
+    key = key_to_int(key)
+    codebook = encrypt_blocks(ALL_BLOCKS, key)
+    plaintext_flips = np.empty((16, 16), dtype=np.int64)
+    key_flips = np.empty((16, 16), dtype=np.int64)
+    max_differential = 0
+
+    for bit in range(16):
+        flip = np.uint16(1 << bit)
+        differences = codebook ^ codebook[ALL_BLOCKS ^ flip]
+        plaintext_flips[bit] = bit_flip_counts(differences)
+        max_differential = max(max_differential, int(np.bincount(differences).max()))
+
+        differences = codebook ^ encrypt_blocks(ALL_BLOCKS, key ^ (1 << bit))
+        key_flips[bit] = bit_flip_counts(differences)
+
+    return plaintext_flips, key_flips, max_differential
+
+
+class AvalancheStats:
+    """
+    Avalanche statistics summed over a set of keys.
+
+    plaintext_matrix[i][j] (and key_matrix[i][j]) is the probability that
+    output bit j flips when plaintext (key) bit i is flipped; an ideal
+    cipher gives 0.5 everywhere (strict avalanche criterion).
+    """
+
+    def __init__(self, keys, plaintext_flips, key_flips, max_differential, seconds):
+        trials = len(keys) * len(ALL_BLOCKS)
+        self.keys = keys
+        self.plaintext_matrix = plaintext_flips / trials
+        self.key_matrix = key_flips / trials
+        # Highest probability of any single-bit input difference mapping to one output difference
+        self.max_differential_probability = max_differential / len(ALL_BLOCKS)
+        self.seconds = seconds
+
+    @property
+    def plaintext_avalanche(self):
+        """Mean number of output bits flipped by a one-bit plaintext change"""
+        return float(self.plaintext_matrix.sum(axis=1).mean())
+
+    @property
+    def key_avalanche(self):
+        """Mean number of output bits flipped by a one-bit key change"""
+        return float(self.key_matrix.sum(axis=1).mean())
+
+    def report(self):
+        """Return a human readable summary"""
+        sac_deviation = np.abs(self.plaintext_matrix - 0.5).max()
+        return '\n'.join([
+            f"Keys analysed: {len(self.keys)} ({self.seconds:.2f} s)",
+            f"Plaintext avalanche: {self.plaintext_avalanche:.3f} of 16 bits "
+            f"({self.plaintext_avalanche / 16:.1%})",
+            f"Key avalanche: {self.key_avalanche:.3f} of 16 bits ({self.key_avalanche / 16:.1%})",
+            f"Largest deviation from the strict avalanche criterion: {sac_deviation:.3f}",
+            f"Highest single-bit differential probability: {self.max_differential_probability:.4f}",
+        ])
+
+
+def sample_keys(count, seed=0):
+    """Return count distinct random keys (reproducible for a given seed)"""
+    rng = np.random.default_rng(seed)
+    return rng.choice(1 << 16, size=count, replace=False).tolist()
+
+
+def avalanche(keys, workers=1):
+    """
+    Plaintext and key avalanche over all 65,536 plaintexts for every key,
+    optionally spread over a process pool (workers=None: one per CPU)
+    """
+    keys = [key_to_int(key) for key in keys]
+    workers = workers if workers is not None else os.cpu_count() or 1
+    start = time.perf_counter()
+
+    if workers > 1 and len(keys) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(key_statistics, keys))
+    else:
+        results = [key_statistics(key) for key in keys]
+
+    plaintext_flips = sum(result[0] for result in results)
+    key_flips = sum(result[1] for result in results)
+    max_differential = max(result[2] for result in results)
+    return AvalancheStats(keys, plaintext_flips, key_flips, max_differential,
+                          time.perf_counter() - start)
+
+
+def format_table(table):
+    """Format a 16x16 table with hex row and column headers"""
+    lines = ['     ' + ' '.join(f'{col:>3X}' for col in range(16))]
+    for row, values in enumerate(table):
+        lines.append(f'{row:>3X}: ' + ' '.join(f'{value:>3d}' for value in values))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    """Command line: print the S-box tables and the avalanche summary"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mini-AES differential, linear and avalanche analysis")
+    parser.add_argument('--keys', type=int, default=16, help="number of random keys (default: 16)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the key sample (default: 0)")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help="worker processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    print("S-box difference distribution table (rows dx, columns dy):")
+    print(format_table(difference_distribution_table()))
+    print("\nS-box linear approximation table (rows input mask, columns output mask):")
+    print(format_table(linear_approximation_table()))
+    print()
+    print(avalanche(sample_keys(args.keys, args.seed), args.workers).report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""
+Cryptanalytic attacks on Mini-AES, built on the vectorized batch API.
+
+The 16-bit key space is small enough to handle as one NumPy array, so an
+exhaustive known-plaintext search expands all 65,536 keys at once and
+encrypts the known plaintext under every key in a single batch. The same
+idea gives a meet-in-the-middle attack on double (cascaded) Mini-AES.
+
+    python mini_aes_attacks.py keysearch A5B3:E3DC
+    python mini_aes_attacks.py mitm 0001:XXXX 0002:YYYY 0003:ZZZZ
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from mini_aes import (block_to_int, decrypt_with_round_keys, encrypt_blocks,
+                      encrypt_with_round_keys, expand_keys)
+
+# Every possible 16-bit key (or block)
+ALL_KEYS = np.arange(1 << 16, dtype=np.uint16)
+
+
+def normalize_pairs(pairs):
+    """Convert (plaintext, ciphertext) pairs to 16-bit integers"""
+    pairs = [(block_to_int(plaintext), block_to_int(ciphertext)) for plaintext, ciphertext in pairs]
+    if not pairs:
+        raise ValueError("At least one plaintext/ciphertext pair is needed")
+    return pairs
+
+
+def search_keys(pairs, keys=None):
+    """
+    Exhaustive known-plaintext key search.
+
+    pairs is a sequence of (plaintext, ciphertext) blocks, each a 16-bit
+    int, a 4-digit hex string or a list of nibbles. Every key (or only the
+    given candidate keys) is tried against the first pair in one batch; the
+    survivors are filtered by the remaining pairs. Returns the sorted list
+    of all keys consistent with every pair.
+    """
+    pairs = normalize_pairs(pairs)
+    candidates = ALL_KEYS if keys is None else np.unique(np.asarray(keys, dtype=np.uint16))
+    round_keys = expand_keys(candidates)
+
+    for plaintext, ciphertext in pairs:
+        encrypted = encrypt_with_round_keys(np.uint16(plaintext), round_keys)
+        match = encrypted == ciphertext
+        candidates = candidates[match]
+        round_keys = round_keys[:, match]
+        if not len(candidates):
+            break
+
+    return candidates.tolist()
+
+
+def search_keys_many(problems, workers=None):
+    """
+    Run search_keys for many independent problems (each a sequence of
+    pairs encrypted under one unknown key). With workers > 1 the problems
+    are split across a process pool. Returns one key list per problem.
+    """
+    problems = [normalize_pairs(pairs) for pairs in problems]
+    workers = workers if workers is not None else os.cpu_count() or 1
+    if workers < 2 or len(problems) < 2:
+        return [search_keys(pairs) for pairs in problems]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunksize = max(1, len(problems) // (4 * workers))
+        return list(executor.map(search_keys, problems, chunksize=chunksize))
+
+
+class MITMResult:
+    """
+    Outcome of a meet-in-the-middle search: the surviving (k1, k2) key
+    pairs, the number of candidates after the first pair, the time spent in
+    each stage (seconds) and the peak size of the working arrays (bytes)
+    """
+
+    def __init__(self, keys, candidates, timings, memory):
+        self.keys = keys
+        self.candidates = candidates
+        self.timings = timings
+        self.memory = memory
+
+    def report(self):
+        """Return a human readable summary"""
+        lines = [f"Stage {stage}: {seconds * 1000:.1f} ms" for stage, seconds in self.timings.items()]
+        lines.append(f"Total: {sum(self.timings.values()) * 1000:.1f} ms")
+        lines.append(f"Candidates after the first pair: {self.candidates}")
+        lines.append(f"Working memory: {self.memory / 1024:.0f} KiB")
+        lines.append(f"Key pairs found: {len(self.keys)}")
+        for k1, k2 in self.keys[:10]:
+            lines.append(f"  k1={k1:04X} k2={k2:04X}")
+        if len(self.keys) > 10:
+            lines.append(f"  ... {len(self.keys) - 10} more")
+        return '\n'.join(lines)
+
+
+def double_encrypt(blocks, k1, k2):
+    """Cascade encryption C = E_k2(E_k1(P)) of an array of blocks"""
+    return encrypt_blocks(encrypt_blocks(blocks, k1), k2)
+
+
+def meet_in_the_middle(pairs, batch_keys=4096):
+    """
+    Recover the key pairs of double Mini-AES, C = E_k2(E_k1(P)), from known
+    plaintext/ciphertext pairs in about 2 * 2^16 encryptions instead of 2^32.
+
+    1. forward:  X[k1] = E_k1(P) for every k1, in one batch
+    2. index:    sort X, keeping the k1 for each entry (argsort)
+    3. backward: Y[k2] = D_k2(C) for every k2, in one batch
+    4. probe:    look up each Y[k2] in the sorted X (searchsorted); every
+                 equal entry gives a candidate (k1, k2), about 2^16 in total
+    5. filter:   keep the candidates that also map the other pairs correctly
+
+    Candidates are generated for batch_keys values of k2 at a time, so the
+    working memory stays bounded: the round keys of all keys (4 x 2^16
+    uint16, 512 KiB), X, Y and the index (2^16 x (2 + 2 + 8) bytes, 768 KiB)
+    plus a few arrays of roughly batch_keys candidates each.
+    """
+    pairs = normalize_pairs(pairs)
+    (plaintext, ciphertext), extra_pairs = pairs[0], pairs[1:]
+    timings = {}
+
+    start = time.perf_counter()
+    round_keys = expand_keys(ALL_KEYS)
+    forward = encrypt_with_round_keys(np.uint16(plaintext), round_keys)
+    timings['forward'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    order = np.argsort(forward, kind='stable')
+    sorted_forward = forward[order]
+    timings['index'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backward = decrypt_with_round_keys(np.uint16(ciphertext), round_keys)
+    timings['backward'] = time.perf_counter() - start
+
+    memory = round_keys.nbytes + forward.nbytes + order.nbytes + sorted_forward.nbytes + backward.nbytes
+    timings['probe'] = timings['filter'] = 0.0
+    candidates = 0
+    found = []
+
+    for first in range(0, len(ALL_KEYS), batch_keys):
+        start = time.perf_counter()
+        k2 = ALL_KEYS[first:first + batch_keys]
+        targets = backward[first:first + batch_keys]
+        low = np.searchsorted(sorted_forward, targets, side='left')
+        high = np.searchsorted(sorted_forward, targets, side='right')
+        counts = high - low
+
+        # Expand every (k2, matching range) into one candidate per k1
+        total = int(counts.sum())
+        candidate_k2 = np.repeat(k2, counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidate_k1 = order[np.repeat(low, counts) + offsets].astype(np.uint16)
+        candidates += total
+        timings['probe'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for extra_plaintext, extra_ciphertext in extra_pairs:
+            if not len(candidate_k1):
+                break
+            middle = encrypt_with_round_keys(np.uint16(extra_plaintext), round_keys[:, candidate_k1])
+            encrypted = encrypt_with_round_keys(middle, round_keys[:, candidate_k2])
+            match = encrypted == extra_ciphertext
+            candidate_k1 = candidate_k1[match]
+            candidate_k2 = candidate_k2[match]
+        found.extend(zip(candidate_k1.tolist(), candidate_k2.tolist()))
+        timings['filter'] += time.perf_counter() - start
+
+        memory = max(memory, round_keys.nbytes + forward.nbytes + order.nbytes
+                     + sorted_forward.nbytes + backward.nbytes + total * (2 + 2 + 8 + 8))
+
+    found.sort()
+    return MITMResult(found, candidates, timings, memory)
+
+
+def parse_pair(text):
+    """Parse a 'PPPP:CCCC' command line pair"""
+    plaintext, _, ciphertext = text.partition(':')
+    return block_to_int(plaintext), block_to_int(ciphertext)
+
+
+def main(argv=None):
+    """Command line: key search and meet-in-the-middle on known pairs"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mini-AES known-plaintext attacks")
+    commands = parser.add_subparsers(dest='command', required=True)
+    for command, help_text in (('keysearch', "exhaustive search for a single key"),
+                               ('mitm', "meet-in-the-middle on double Mini-AES")):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument('pairs', nargs='+', type=parse_pair,
+                         help="known plaintext:ciphertext pairs, e.g. A5B3:E3DC")
+    args = parser.parse_args(argv)
+
+    if args.command == 'keysearch':
+        start = time.perf_counter()
+        keys = search_keys(args.pairs)
+        print(f"Searched 65536 keys in {(time.perf_counter() - start) * 1000:.1f} ms")
+        print(f"Keys found: {' '.join(f'{key:04X}' for key in keys) or 'none'}")
+    else:
+        print(meet_in_the_middle(args.pairs).report())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Benchmarks for the Mini-AES engines and block modes.
+
+Measures single-block latency of every engine, key-schedule cost, ECB/CBC
+throughput over a range of message sizes and the cold-import time of the
+module. Results are printed and can be saved as JSON; two saved runs can be
+compared to flag regressions.
+
+    python mini_aes_bench.py run -o before.json
+    python mini_aes_bench.py run --quick -o after.json
+    python mini_aes_bench.py compare before.json after.json --threshold 0.1
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+
+import numpy as np
+
+import mini_aes
+from mini_aes import (CODEBOOK_MIN_BLOCKS, TRACE_FULL, TRACE_OFF, BlockModeMiniAES, Codebook,
+                      CodebookCache, KeySchedule, MiniAES, decrypt_block_ttable, encrypt_block,
+                      encrypt_block_ttable, encrypt_blocks, expand_keys, key_schedule,
+                      unpack_state)
+
+KEY = 0xC9D2
+IV = 0x1234
+BLOCK = 0xA5B3
+
+DEFAULT_SIZES = '1K,64K,1M,10M,100M'
+QUICK_SIZES = '1K,64K,1M'
+
+# Units and whether a smaller value is better
+UNITS = {'ns': True, 'ms': True, 'MB/s': False}
+
+
+def parse_size(text):
+    """Parse a size such as 1K, 64K, 10M or 4096 into bytes"""
+    text = text.strip().upper().rstrip('B')
+    multiplier = 1
+    if text and text[-1] in 'KMG':
+        multiplier = 1024 ** ('KMG'.index(text[-1]) + 1)
+        text = text[:-1]
+    try:
+        size = int(text) * multiplier
+    except ValueError:
+        raise ValueError(f"Invalid size: {text!r}")
+    if size <= 0 or size % 2:
+        raise ValueError("Sizes must be a positive, even number of bytes")
+    return size
+
+
+def format_size(size):
+    """Format a byte count with the largest exact unit"""
+    for suffix, unit in (('M', 1 << 20), ('K', 1 << 10)):
+        if size % unit == 0:
+            return f'{size // unit}{suffix}'
+    return str(size)
+
+
+def best_time(function, repeat=5):
+    """
+    Best time per call in seconds. The number of calls per measurement is
+    chosen by timeit's autorange; calls slower than a second are timed once.
+    """
+    timer = timeit.Timer(function)
+    number, elapsed = timer.autorange()
+    times = [elapsed / number]
+    if elapsed < 1.0:
+        times += [t / number for t in timer.repeat(repeat - 1, number)]
+    return min(times)
+
+
+class Results:
+    """Collected measurements: name -> (value, unit)"""
+
+    def __init__(self, verbose=True):
+        self.values = {}
+        self.verbose = verbose
+
+    def add(self, name, value, unit):
+        self.values[name] = {'value': value, 'unit': unit}
+        if self.verbose:
+            print(f'{name:<48} {value:>14.2f} {unit}', flush=True)
+
+    def to_json(self):
+        return {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'numpy': np.__version__,
+                'cpu_count': os.cpu_count(),
+            },
+            'results': self.values,
+        }
+
+
+def bench_latency(results, repeat):
+    """Single-block latency of every engine, in ns per call"""
+    state = unpack_state(BLOCK)
+    schedule = key_schedule(KEY)
+    key_state = unpack_state(KEY)
+    codebook = Codebook.build(schedule)
+    quiet = MiniAES(trace=TRACE_OFF)
+    traced = MiniAES(trace=TRACE_FULL)
+    block_mode = BlockModeMiniAES()
+
+    def traced_encrypt():
+        traced.clear_log()
+        traced.encrypt(state, schedule)
+
+    cases = [
+        ('latency.MiniAES.encrypt[trace=full]', traced_encrypt),
+        ('latency.MiniAES.encrypt[trace=off]', lambda: quiet.encrypt(state, schedule)),
+        ('latency.MiniAES.decrypt[trace=off]', lambda: quiet.decrypt(state, schedule)),
+        ('latency.MiniAES.gf_multiply', lambda: MiniAES.gf_multiply(0x9, 0xE)),
+        ('latency.encrypt_block', lambda: encrypt_block(BLOCK, schedule)),
+        ('latency.encrypt_block_ttable', lambda: encrypt_block_ttable(BLOCK, schedule)),
+        ('latency.decrypt_block_ttable', lambda: decrypt_block_ttable(BLOCK, schedule)),
+        ('latency.Codebook.encrypt_block', lambda: codebook.encrypt_block(BLOCK)),
+        ('latency.BlockModeMiniAES.ecb_encrypt[hex]', lambda: block_mode.ecb_encrypt('A5B3', 'C9D2')),
+        ('key_schedule.MiniAES.key_expansion', lambda: quiet.key_expansion(key_state)),
+        ('key_schedule.KeySchedule', lambda: KeySchedule(KEY)),
+        ('key_schedule.key_schedule[cached]', lambda: key_schedule(KEY)),
+        ('key_schedule.Codebook.build', lambda: Codebook.build(schedule)),
+    ]
+    for name, function in cases:
+        results.add(name, best_time(function, repeat) * 1e9, 'ns')
+
+    all_keys = np.arange(1 << 16, dtype=np.uint16)
+    results.add('key_schedule.expand_keys[per key]',
+                best_time(lambda: expand_keys(all_keys), repeat) * 1e9 / all_keys.size, 'ns')
+
+
+def bench_throughput(results, sizes, repeat):
+    """
+    ECB/CBC encryption and decryption throughput in MB/s. Every measurement
+    gets its own codebook cache, so the path it measures depends only on the
+    message size: the T-table engine below CODEBOOK_MIN_BLOCKS, otherwise the
+    key's codebook, built before timing. The path is part of the name.
+    """
+    for size in sizes:
+        data = os.urandom(size)
+        path = 'codebook' if size // 2 >= CODEBOOK_MIN_BLOCKS else 'ttable'
+        for mode in ('ecb', 'cbc'):
+            ciphertext = BlockModeMiniAES(codebooks=CodebookCache()).encrypt_bytes(data, mode, KEY, IV)
+            for direction in ('encrypt', 'decrypt'):
+                block_mode = BlockModeMiniAES(codebooks=CodebookCache())
+                if path == 'codebook':
+                    block_mode.codebooks.get(KEY)
+                if direction == 'encrypt':
+                    function = lambda: block_mode.encrypt_bytes(data, mode, KEY, IV)
+                else:
+                    function = lambda: block_mode.decrypt_bytes(ciphertext, mode, KEY, IV)
+                seconds = best_time(function, repeat)
+                results.add(f'throughput.{mode}.{direction}[{format_size(size)},{path}]',
+                            size / seconds / 1e6, 'MB/s')
+
+    blocks = np.frombuffer(os.urandom(1 << 20), dtype=np.uint16)
+    for backend in mini_aes.BLOCK_BACKENDS:
+        seconds = best_time(lambda: encrypt_blocks(blocks, KEY, backend=backend), repeat)
+        results.add(f'throughput.encrypt_blocks[{backend}]', blocks.nbytes / seconds / 1e6, 'MB/s')
+
+
+def bench_import(results, repeat):
+    """Cold-import time of the module in a fresh interpreter, in ms"""
+    directory = os.path.dirname(os.path.abspath(mini_aes.__file__))
+
+    def run(code):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=directory, check=True)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    baseline = run('pass')
+    results.add('import.interpreter', baseline * 1e3, 'ms')
+    results.add('import.mini_aes', (run('import mini_aes') - baseline) * 1e3, 'ms')
+    results.add('import.mini_aes+first_block',
+                (run('import mini_aes; mini_aes.encrypt_block(0xA5B3, 0xC9D2)') - baseline) * 1e3, 'ms')
+    results.add('import.mini_aes+first_batch',
+                (run('import mini_aes; mini_aes.encrypt_blocks(b"\\xa5\\xb3", 0xC9D2)') - baseline) * 1e3,
+                'ms')
+
+
+def compare(baseline, current, threshold=0.1):
+    """
+    Compare two runs. Returns (lines, regressions) where a regression is a
+    result that got worse by more than threshold (a fraction)
+    """
+    base_results = baseline['results']
+    current_results = current['results']
+    lines = []
+    regressions = []
+    for name, entry in current_results.items():
+        if name not in base_results:
+            lines.append(f'{name:<48} {"new":>14}')
+            continue
+        old, new = base_results[name]['value'], entry['value']
+        lower_is_better = UNITS.get(entry['unit'], True)
+        change = (new - old) / old if old else 0.0
+        worse = change > threshold if lower_is_better else change < -threshold
+        better = change < -threshold if lower_is_better else change > threshold
+        flag = 'REGRESSION' if worse else ('improved' if better else '')
+        if worse:
+            regressions.append(name)
+        lines.append(f'{name:<48} {old:>14.2f} -> {new:>14.2f} {entry["unit"]:<5} {change:+8.1%} {flag}')
+    for name in base_results:
+        if name not in current_results:
+            lines.append(f'{name:<48} {"missing":>14}')
+    return lines, regressions
+
+
+def main(argv=None):
+    """Command line: run the benchmarks or compare two JSON result files"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mini-AES benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run the benchmarks")
+    run_parser.add_argument('-o', '--output', help="write the results as JSON to this file")
+    run_parser.add_argument('--sizes', help=f"message sizes (default: {DEFAULT_SIZES})")
+    run_parser.add_argument('--quick', action='store_true',
+                            help=f"small sizes only ({QUICK_SIZES}) and fewer repeats")
+    run_parser.add_argument('--repeat', type=int, help="measurements per benchmark (default: 5)")
+    run_parser.add_argument('--only', choices=('latency', 'throughput', 'import'), action='append',
+                            help="run only these groups (repeatable)")
+
+    compare_parser = commands.add_parser('compare', help="compare two JSON result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="relative change flagged as a regression (default: 0.1)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        lines, regressions = compare(baseline, current, args.threshold)
+        print('\n'.join(lines))
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    try:
+        sizes = [parse_size(size) for size in
+                 (args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)).split(',')]
+    except ValueError as e:
+        parser.error(str(e))
+    repeat = args.repeat or (3 if args.quick else 5)
+    groups = args.only or ('latency', 'throughput', 'import')
+
+    results = Results()
+    if 'latency' in groups:
+        bench_latency(results, repeat)
+    if 'throughput' in groups:
+        bench_throughput(results, sizes, repeat)
+    if 'import' in groups:
+        bench_import(results, repeat)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results.to_json(), f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
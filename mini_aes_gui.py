@@ -0,0 +1,715 @@
+import os
+import queue
+import tempfile
+import threading
+import time
+import tkinter as tk
+from tkinter import filedialog, ttk, scrolledtext
+
+from mini_aes import TEST_VECTORS, BlockModeMiniAES, MiniAES, to_uint16
+
+# Block modes tab: bytes per StreamCipher.update call in the worker thread,
+# and how often the Tk thread polls the worker's message queue
+MODE_CHUNK_SIZE = 64 * 1024
+POLL_MS = 50
+
+# Largest output shown as hex in the result box; bigger results are saved to a file
+MAX_HEX_DISPLAY = 64 * 1024
+
+# Trace viewer: lines shown at once, and bytes scanned per step while indexing
+TRACE_VIEW_LINES = 30
+TRACE_INDEX_CHUNK = 16 * 1024 * 1024
+
+
+class ModeJob(threading.Thread):
+    """
+    Background ECB/CBC job for the block modes tab.
+
+    Runs the input through StreamCipher.update in chunks and reports to the
+    Tk thread only through a queue of messages:
+    ('progress', done, total), ('done', result, seconds), ('cancelled',)
+    and ('error', message). result is the output bytes, or the output path
+    when writing to a file. Setting cancel stops the job between chunks; a
+    partially written output file is removed.
+    """
+
+    def __init__(self, block_mode, mode, key, iv, decrypt, padding, source, output_path=None):
+        super().__init__(daemon=True)
+        self.block_mode = block_mode
+        self.mode = mode
+        self.key = key
+        self.iv = iv
+        self.decrypt = decrypt
+        self.padding = padding
+        # bytes, or the path of an input file
+        self.source = source
+        self.output_path = output_path
+        self.messages = queue.Queue()
+        self.cancel = threading.Event()
+
+    def run(self):
+        start = time.perf_counter()
+        try:
+            result = self.process()
+        except (OSError, ValueError) as e:
+            self.messages.put(('error', str(e)))
+            return
+        except Exception as e:
+            # Anything else is a bug, but the Tk thread must still hear that
+            # the job ended or it keeps polling with Start disabled
+            self.messages.put(('error', f"{type(e).__name__}: {e}"))
+            return
+        if result is None:
+            self.messages.put(('cancelled',))
+        else:
+            self.messages.put(('done', result, time.perf_counter() - start))
+
+    def process(self):
+        """Run the job; returns None when cancelled"""
+        cipher = self.block_mode.stream_cipher(self.mode, self.key, self.iv, self.decrypt, self.padding)
+        if isinstance(self.source, (bytes, bytearray)):
+            total = len(self.source)
+            chunks = (self.source[i:i + MODE_CHUNK_SIZE] for i in range(0, total, MODE_CHUNK_SIZE))
+            return self.run_chunks(cipher, chunks, total)
+
+        total = os.path.getsize(self.source)
+        with open(self.source, 'rb') as src:
+            chunks = iter(lambda: src.read(MODE_CHUNK_SIZE), b'')
+            return self.run_chunks(cipher, chunks, total)
+
+    def run_chunks(self, cipher, chunks, total):
+        if self.output_path is None:
+            output = []
+            for chunk in self.progress(chunks, total):
+                if self.cancel.is_set():
+                    return None
+                output.append(cipher.update(chunk))
+            output.append(cipher.finalize())
+            return b''.join(output)
+
+        # Write next to the target and rename at the end, so a cancelled or
+        # failed job never leaves a truncated output file behind
+        directory = os.path.dirname(os.path.abspath(self.output_path))
+        fd, temp_path = tempfile.mkstemp(prefix='.mini_aes-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as dst:
+                for chunk in self.progress(chunks, total):
+                    if self.cancel.is_set():
+                        return None
+                    dst.write(cipher.update(chunk))
+                dst.write(cipher.finalize())
+            os.replace(temp_path, self.output_path)
+            temp_path = None
+            return self.output_path
+        finally:
+            if temp_path is not None:
+                os.unlink(temp_path)
+
+    def progress(self, chunks, total):
+        """Yield the chunks, reporting progress after each one is processed"""
+        done = 0
+        for chunk in chunks:
+            yield chunk
+            done += len(chunk)
+            self.messages.put(('progress', done, total))
+
+
+class TraceIndex:
+    """
+    Line index of a trace file for the windowed viewer.
+
+    The file is memory-mapped and scanned once for line starts (kept as a
+    NumPy array of byte offsets) and for the "Block N:" records, so any page
+    of lines can be read with one slice of the mapping and only the pages
+    that are shown are ever decoded.
+    """
+
+    def __init__(self, path):
+        import mmap
+        import numpy as np
+
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.mapping = None
+        if self.size == 0:
+            self.offsets = np.zeros(0, dtype=np.int64)
+            self.blocks = np.zeros(0, dtype=np.int64)
+            return
+
+        with open(path, 'rb') as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        starts = [np.zeros(1, dtype=np.int64)]
+        for position in range(0, self.size, TRACE_INDEX_CHUNK):
+            chunk = np.frombuffer(self.mapping, dtype=np.uint8, offset=position,
+                                  count=min(TRACE_INDEX_CHUNK, self.size - position))
+            starts.append(np.flatnonzero(chunk == 0x0A).astype(np.int64) + position + 1)
+        offsets = np.concatenate(starts)
+        # A final newline does not start another line
+        self.offsets = offsets[offsets < self.size]
+
+        blocks = [0] if self.mapping[:6] == b'Block ' else []
+        position = self.mapping.find(b'\nBlock ')
+        while position != -1:
+            blocks.append(position + 1)
+            position = self.mapping.find(b'\nBlock ', position + 1)
+        self.blocks = np.array(blocks, dtype=np.int64)
+
+    @property
+    def line_count(self):
+        return len(self.offsets)
+
+    @property
+    def block_count(self):
+        return len(self.blocks)
+
+    def lines(self, start, count):
+        """Return up to count lines starting at line start"""
+        if start >= self.line_count or count <= 0:
+            return []
+        begin = int(self.offsets[start])
+        stop = start + count
+        end = int(self.offsets[stop]) if stop < self.line_count else self.size
+        return self.mapping[begin:end].decode('utf-8', errors='replace').splitlines()
+
+    def line_of(self, position):
+        """Line number containing a byte position"""
+        import numpy as np
+
+        return int(np.searchsorted(self.offsets, position, side='right')) - 1
+
+    def block_line(self, number):
+        """Line of the "Block number:" record, or None if there is no such block"""
+        if not 1 <= number <= self.block_count:
+            return None
+        return self.line_of(int(self.blocks[number - 1]))
+
+    def search(self, text, start_line=0):
+        """
+        Line of the next occurrence of text at or after start_line, wrapping
+        around to the start of the file; None if it does not occur
+        """
+        if self.mapping is None or not text:
+            return None
+        pattern = text.encode('utf-8')
+        start = int(self.offsets[start_line]) if start_line < self.line_count else self.size
+        position = self.mapping.find(pattern, start)
+        if position == -1:
+            position = self.mapping.find(pattern, 0, start + len(pattern))
+        return None if position == -1 else self.line_of(position)
+
+    def close(self):
+        if self.mapping is not None:
+            self.mapping.close()
+            self.mapping = None
+
+
+class MiniAESApp:
+    """
+    GUI application for Mini-AES
+    """
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Mini-AES Implementation")
+        self.root.geometry("800x600")
+        
+        self.mini_aes = MiniAES()
+        
+        # Create tabs
+        self.tab_control = ttk.Notebook(root)
+        
+        self.tab1 = ttk.Frame(self.tab_control)
+        self.tab2 = ttk.Frame(self.tab_control)
+        self.tab_modes = ttk.Frame(self.tab_control)
+        self.tab3 = ttk.Frame(self.tab_control)
+        
+        self.tab_control.add(self.tab1, text='Encryption/Decryption')
+        self.tab_control.add(self.tab2, text='Test Cases')
+        self.tab_control.add(self.tab_modes, text='Block Modes')
+        self.tab_control.add(self.tab3, text='About')
+        
+        self.tab_control.pack(expand=1, fill="both")
+        
+        # Tab 1: Encryption/Decryption
+        self.setup_encryption_tab()
+        
+        # Tab 2: Test Cases
+        self.setup_test_cases_tab()
+        
+        # Block Modes: ECB/CBC on a background thread
+        self.block_mode = BlockModeMiniAES()
+        self.mode_job = None
+        self.mode_input_path = None
+        self.mode_output_path = None
+        self.setup_modes_tab()
+        
+        # Trace viewer for large trace files
+        self.tab_trace = ttk.Frame(self.tab_control)
+        self.tab_control.insert(self.tab3, self.tab_trace, text='Trace Viewer')
+        self.trace_index = None
+        self.trace_top = 0
+        # Highlighted line; "Find Next" continues after it
+        self.trace_match = None
+        self.setup_trace_tab()
+        
+        # Tab 3: About
+        self.setup_about_tab()
+    
+    def setup_encryption_tab(self):
+        # Frame for input
+        input_frame = ttk.LabelFrame(self.tab1, text="Input")
+        input_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        # Plaintext/Ciphertext input
+        ttk.Label(input_frame, text="Plaintext/Ciphertext (Hex, 4 digits):").grid(column=0, row=0, padx=10, pady=5, sticky=tk.W)
+        self.text_input = ttk.Entry(input_frame, width=30)
+        self.text_input.grid(column=1, row=0, padx=10, pady=5)
+        
+        # Key input
+        ttk.Label(input_frame, text="Key (Hex, 4 digits):").grid(column=0, row=1, padx=10, pady=5, sticky=tk.W)
+        self.key_input = ttk.Entry(input_frame, width=30)
+        self.key_input.grid(column=1, row=1, padx=10, pady=5)
+        
+        # Operation selection
+        ttk.Label(input_frame, text="Operation:").grid(column=0, row=2, padx=10, pady=5, sticky=tk.W)
+        self.operation = tk.StringVar()
+        self.operation.set("encrypt")
+        ttk.Radiobutton(input_frame, text="Encrypt", variable=self.operation, value="encrypt").grid(column=1, row=2, padx=10, pady=5, sticky=tk.W)
+        ttk.Radiobutton(input_frame, text="Decrypt", variable=self.operation, value="decrypt").grid(column=1, row=2, padx=120, pady=5, sticky=tk.W)
+        
+        # Process button
+        ttk.Button(input_frame, text="Process", command=self.process).grid(column=1, row=3, padx=10, pady=5)
+        
+        # Frame for output
+        output_frame = ttk.LabelFrame(self.tab1, text="Output")
+        output_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        # Result text
+        ttk.Label(output_frame, text="Result:").grid(column=0, row=0, padx=10, pady=5, sticky=tk.W)
+        self.result_text = ttk.Entry(output_frame, width=30, state='readonly')
+        self.result_text.grid(column=1, row=0, padx=10, pady=5)
+        
+        # Log area
+        ttk.Label(output_frame, text="Process Log:").grid(column=0, row=1, padx=10, pady=5, sticky=tk.NW)
+        self.log_area = scrolledtext.ScrolledText(output_frame, width=70, height=15)
+        self.log_area.grid(column=1, row=1, padx=10, pady=5)
+    
+    def setup_test_cases_tab(self):
+        # Test cases description
+        ttk.Label(self.tab2, text="Pre-defined Test Cases").pack(padx=10, pady=5, anchor=tk.W)
+        
+        # Frame for test cases
+        test_cases_frame = ttk.Frame(self.tab2)
+        test_cases_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        # Test case buttons
+        ttk.Button(test_cases_frame, text="Test Case 1", command=lambda: self.run_test_case(0)).grid(column=0, row=0, padx=10, pady=5)
+        ttk.Button(test_cases_frame, text="Test Case 2", command=lambda: self.run_test_case(1)).grid(column=1, row=0, padx=10, pady=5)
+        ttk.Button(test_cases_frame, text="Test Case 3", command=lambda: self.run_test_case(2)).grid(column=2, row=0, padx=10, pady=5)
+        
+        # Test case descriptions
+        test_cases_desc = ttk.LabelFrame(self.tab2, text="Test Case Descriptions")
+        test_cases_desc.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        test_cases_text = scrolledtext.ScrolledText(test_cases_desc, width=70, height=20)
+        test_cases_text.pack(padx=10, pady=5, fill="both", expand=True)
+        
+        # Test case information
+        test_cases_info = "\n".join(
+            f"Test Case {number}:\n"
+            f"Plaintext: {plaintext:04X} ({self.format_bits(plaintext)})\n"
+            f"Key: {key:04X} ({self.format_bits(key)})\n"
+            f"Expected Ciphertext: {ciphertext:04X} ({self.format_bits(ciphertext)})\n"
+            for number, (plaintext, key, ciphertext) in enumerate(TEST_VECTORS, 1))
+        test_cases_text.insert(tk.INSERT, test_cases_info)
+        test_cases_text.config(state='disabled')
+    
+    def setup_modes_tab(self):
+        # Frame for settings
+        settings_frame = ttk.LabelFrame(self.tab_modes, text="Settings")
+        settings_frame.pack(fill="x", padx=10, pady=5)
+        
+        ttk.Label(settings_frame, text="Mode:").grid(column=0, row=0, padx=10, pady=5, sticky=tk.W)
+        self.mode_name = tk.StringVar()
+        self.mode_name.set("cbc")
+        ttk.Combobox(settings_frame, textvariable=self.mode_name, values=("ecb", "cbc"),
+                     state='readonly', width=8).grid(column=1, row=0, padx=10, pady=5, sticky=tk.W)
+        
+        ttk.Label(settings_frame, text="Key (Hex, 4 digits):").grid(column=0, row=1, padx=10, pady=5, sticky=tk.W)
+        self.mode_key_input = ttk.Entry(settings_frame, width=10)
+        self.mode_key_input.grid(column=1, row=1, padx=10, pady=5, sticky=tk.W)
+        
+        ttk.Label(settings_frame, text="IV (Hex, 4 digits, CBC):").grid(column=0, row=2, padx=10, pady=5, sticky=tk.W)
+        self.mode_iv_input = ttk.Entry(settings_frame, width=10)
+        self.mode_iv_input.grid(column=1, row=2, padx=10, pady=5, sticky=tk.W)
+        
+        self.mode_operation = tk.StringVar()
+        self.mode_operation.set("encrypt")
+        ttk.Radiobutton(settings_frame, text="Encrypt", variable=self.mode_operation, value="encrypt").grid(column=2, row=0, padx=10, pady=5, sticky=tk.W)
+        ttk.Radiobutton(settings_frame, text="Decrypt", variable=self.mode_operation, value="decrypt").grid(column=2, row=1, padx=10, pady=5, sticky=tk.W)
+        
+        self.mode_padding = tk.BooleanVar()
+        self.mode_padding.set(True)
+        ttk.Checkbutton(settings_frame, text="PKCS#7 padding", variable=self.mode_padding).grid(column=2, row=2, padx=10, pady=5, sticky=tk.W)
+        
+        # Frame for input: hex text, or a file
+        input_frame = ttk.LabelFrame(self.tab_modes, text="Input (Hex, or load a file)")
+        input_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        self.mode_text_input = scrolledtext.ScrolledText(input_frame, width=70, height=5)
+        self.mode_text_input.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        file_frame = ttk.Frame(input_frame)
+        file_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Button(file_frame, text="Load File...", command=self.choose_mode_input).pack(side=tk.LEFT)
+        ttk.Button(file_frame, text="Save Output As...", command=self.choose_mode_output).pack(side=tk.LEFT, padx=10)
+        ttk.Button(file_frame, text="Clear Files", command=self.clear_mode_files).pack(side=tk.LEFT)
+        self.mode_files_label = ttk.Label(input_frame, text="Input: text box, output: shown below")
+        self.mode_files_label.pack(fill="x", padx=10, pady=5)
+        
+        # Run, cancel and progress
+        run_frame = ttk.Frame(self.tab_modes)
+        run_frame.pack(fill="x", padx=10, pady=5)
+        self.mode_start_button = ttk.Button(run_frame, text="Start", command=self.start_mode_job)
+        self.mode_start_button.pack(side=tk.LEFT)
+        self.mode_cancel_button = ttk.Button(run_frame, text="Cancel", command=self.cancel_mode_job, state='disabled')
+        self.mode_cancel_button.pack(side=tk.LEFT, padx=10)
+        self.mode_progress = ttk.Progressbar(run_frame, orient=tk.HORIZONTAL, mode='determinate', maximum=100)
+        self.mode_progress.pack(side=tk.LEFT, fill="x", expand=True, padx=10)
+        self.mode_status = ttk.Label(self.tab_modes, text="Idle")
+        self.mode_status.pack(fill="x", padx=10)
+        
+        # Output
+        output_frame = ttk.LabelFrame(self.tab_modes, text="Output (Hex)")
+        output_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.mode_output = scrolledtext.ScrolledText(output_frame, width=70, height=5)
+        self.mode_output.pack(fill="both", expand=True, padx=10, pady=5)
+    
+    def choose_mode_input(self):
+        path = filedialog.askopenfilename(title="Input file")
+        if path:
+            self.mode_input_path = path
+            self.update_mode_files_label()
+    
+    def choose_mode_output(self):
+        path = filedialog.asksaveasfilename(title="Output file")
+        if path:
+            self.mode_output_path = path
+            self.update_mode_files_label()
+    
+    def clear_mode_files(self):
+        self.mode_input_path = None
+        self.mode_output_path = None
+        self.update_mode_files_label()
+    
+    def update_mode_files_label(self):
+        source = self.mode_input_path or "text box"
+        target = self.mode_output_path or "shown below"
+        self.mode_files_label.config(text=f"Input: {source}, output: {target}")
+    
+    def start_mode_job(self):
+        """Start an ECB/CBC job on a background thread"""
+        if self.mode_job is not None:
+            return
+        try:
+            mode = self.mode_name.get()
+            key = to_uint16(self.mode_key_input.get().strip(), "Key")
+            iv = None
+            if mode == 'cbc':
+                iv = to_uint16(self.mode_iv_input.get().strip(), "IV")
+            if self.mode_input_path is not None:
+                source = self.mode_input_path
+            else:
+                source = bytes.fromhex(''.join(self.mode_text_input.get(1.0, tk.END).split()))
+            padding = 'pkcs7' if self.mode_padding.get() else None
+            decrypt = self.mode_operation.get() == "decrypt"
+        except ValueError as e:
+            self.mode_status.config(text=f"Error: {e}")
+            return
+        
+        self.mode_job = ModeJob(self.block_mode, mode, key, iv, decrypt, padding, source,
+                                self.mode_output_path)
+        self.mode_progress['value'] = 0
+        self.mode_status.config(text="Running...")
+        self.mode_start_button.config(state='disabled')
+        self.mode_cancel_button.config(state='normal')
+        self.mode_job.start()
+        self.root.after(POLL_MS, self.poll_mode_job)
+    
+    def cancel_mode_job(self):
+        if self.mode_job is not None:
+            self.mode_job.cancel.set()
+            self.mode_status.config(text="Cancelling...")
+    
+    def poll_mode_job(self):
+        """Apply the worker's queued messages; runs on the Tk thread via root.after"""
+        job = self.mode_job
+        finished = None
+        while True:
+            try:
+                message = job.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                done, total = message[1], message[2]
+                self.mode_progress['value'] = 100 * done / total if total else 100
+                self.mode_status.config(text=f"Processed {done:,} of {total:,} bytes")
+            else:
+                finished = message
+        
+        if finished is None:
+            self.root.after(POLL_MS, self.poll_mode_job)
+            return
+        
+        self.mode_job = None
+        self.mode_start_button.config(state='normal')
+        self.mode_cancel_button.config(state='disabled')
+        if finished[0] == 'done':
+            result, seconds = finished[1], finished[2]
+            self.mode_progress['value'] = 100
+            self.mode_output.delete(1.0, tk.END)
+            if isinstance(result, str):
+                self.mode_status.config(text=f"Done in {seconds:.2f} s, written to {result}")
+            elif len(result) > MAX_HEX_DISPLAY:
+                self.mode_output.insert(tk.INSERT, result[:MAX_HEX_DISPLAY].hex().upper())
+                self.mode_status.config(text=f"Done in {seconds:.2f} s; showing the first "
+                                             f"{MAX_HEX_DISPLAY:,} of {len(result):,} bytes "
+                                             "(use Save Output As... for the rest)")
+            else:
+                self.mode_output.insert(tk.INSERT, result.hex().upper())
+                self.mode_status.config(text=f"Done in {seconds:.2f} s, {len(result):,} bytes")
+        elif finished[0] == 'cancelled':
+            self.mode_status.config(text="Cancelled")
+        else:
+            self.mode_status.config(text=f"Error: {finished[1]}")
+    
+    def setup_trace_tab(self):
+        # Controls: open, search, jump to block
+        controls = ttk.Frame(self.tab_trace)
+        controls.pack(fill="x", padx=10, pady=5)
+        ttk.Button(controls, text="Open Trace File...", command=self.open_trace_file).pack(side=tk.LEFT)
+        
+        ttk.Label(controls, text="Find:").pack(side=tk.LEFT, padx=(20, 5))
+        self.trace_search_input = ttk.Entry(controls, width=20)
+        self.trace_search_input.pack(side=tk.LEFT)
+        self.trace_search_input.bind('<Return>', lambda event: self.find_in_trace())
+        ttk.Button(controls, text="Find Next", command=self.find_in_trace).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(controls, text="Block:").pack(side=tk.LEFT, padx=(20, 5))
+        self.trace_block_input = ttk.Entry(controls, width=8)
+        self.trace_block_input.pack(side=tk.LEFT)
+        self.trace_block_input.bind('<Return>', lambda event: self.jump_to_block())
+        ttk.Button(controls, text="Go", command=self.jump_to_block).pack(side=tk.LEFT, padx=5)
+        
+        self.trace_status = ttk.Label(self.tab_trace, text="No trace file loaded")
+        self.trace_status.pack(fill="x", padx=10)
+        
+        # Only TRACE_VIEW_LINES lines live in the Text widget; the scrollbar
+        # is driven by the line position in the whole file
+        view_frame = ttk.Frame(self.tab_trace)
+        view_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        self.trace_text = tk.Text(view_frame, width=80, height=TRACE_VIEW_LINES, wrap='none')
+        self.trace_text.pack(side=tk.LEFT, fill="both", expand=True)
+        self.trace_text.tag_configure('match', background='yellow')
+        self.trace_scrollbar = ttk.Scrollbar(view_frame, orient=tk.VERTICAL, command=self.scroll_trace)
+        self.trace_scrollbar.pack(side=tk.RIGHT, fill="y")
+        
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.trace_text.bind(sequence, self.wheel_trace)
+        self.trace_text.bind('<Prior>', lambda event: self.scroll_trace('scroll', -1, 'pages') or 'break')
+        self.trace_text.bind('<Next>', lambda event: self.scroll_trace('scroll', 1, 'pages') or 'break')
+    
+    def open_trace_file(self):
+        path = filedialog.askopenfilename(title="Trace file")
+        if path:
+            self.load_trace_file(path)
+    
+    def load_trace_file(self, path):
+        """Index a trace file and show its first page"""
+        try:
+            index = TraceIndex(path)
+        except (OSError, ValueError) as e:
+            self.trace_status.config(text=f"Error: {e}")
+            return
+        if self.trace_index is not None:
+            self.trace_index.close()
+        self.trace_index = index
+        self.trace_status.config(text=f"{path}: {index.line_count:,} lines, {index.block_count:,} blocks")
+        self.show_trace_lines(0)
+    
+    def show_trace_lines(self, top, highlight=None):
+        """Render the page of lines starting at line top"""
+        index = self.trace_index
+        if index is None:
+            return
+        total = index.line_count
+        self.trace_top = max(0, min(top, total - TRACE_VIEW_LINES))
+        self.trace_match = highlight
+        
+        self.trace_text.config(state='normal')
+        self.trace_text.delete(1.0, tk.END)
+        self.trace_text.insert(tk.INSERT, '\n'.join(index.lines(self.trace_top, TRACE_VIEW_LINES)))
+        if highlight is not None:
+            self.trace_text.tag_add('match', f'{highlight - self.trace_top + 1}.0',
+                                    f'{highlight - self.trace_top + 1}.end')
+        self.trace_text.config(state='disabled')
+        
+        if total:
+            self.trace_scrollbar.set(self.trace_top / total,
+                                     min(1.0, (self.trace_top + TRACE_VIEW_LINES) / total))
+    
+    def scroll_trace(self, action, amount, unit=None):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', n, 'units'/'pages')"""
+        if self.trace_index is None:
+            return
+        if action == 'moveto':
+            top = int(float(amount) * self.trace_index.line_count)
+        else:
+            step = TRACE_VIEW_LINES if unit == 'pages' else 1
+            top = self.trace_top + int(amount) * step
+        self.show_trace_lines(top)
+    
+    def wheel_trace(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_trace('scroll', -3, 'units')
+        else:
+            self.scroll_trace('scroll', 3, 'units')
+        return 'break'
+    
+    def find_in_trace(self):
+        if self.trace_index is None:
+            return
+        text = self.trace_search_input.get()
+        # The page is clamped at the end of the file, so continue after the
+        # last match rather than after the top line
+        start = self.trace_match + 1 if self.trace_match is not None else self.trace_top
+        line = self.trace_index.search(text, start)
+        if line is None:
+            self.trace_status.config(text=f"'{text}' not found")
+            return
+        self.trace_status.config(text=f"'{text}' found at line {line + 1:,}")
+        self.show_trace_lines(line, highlight=line)
+    
+    def jump_to_block(self):
+        if self.trace_index is None:
+            return
+        try:
+            number = int(self.trace_block_input.get())
+        except ValueError:
+            self.trace_status.config(text="Block must be a number")
+            return
+        line = self.trace_index.block_line(number)
+        if line is None:
+            self.trace_status.config(text=f"No block {number} (the trace has {self.trace_index.block_count:,})")
+            return
+        self.show_trace_lines(line, highlight=line)
+    
+    @staticmethod
+    def format_bits(value):
+        """Format a 16-bit value as four groups of 4 bits"""
+        bits = f'{value:016b}'
+        return ' '.join(bits[i:i + 4] for i in range(0, 16, 4))
+    
+    def setup_about_tab(self):
+        about_frame = ttk.Frame(self.tab3)
+        about_frame.pack(fill="both", expand=True, padx=10, pady=5)
+        
+        about_text = scrolledtext.ScrolledText(about_frame, width=70, height=20)
+        about_text.pack(padx=10, pady=5, fill="both", expand=True)
+        
+        about_info = """Mini-AES Implementation
+
+This application implements a simplified version of the Advanced Encryption Standard (AES) algorithm 
+called Mini-AES, which operates on 16-bit blocks with a 16-bit key.
+
+Features:
+- 16-bit block size (4 nibbles)
+- 16-bit key
+- 3 rounds of encryption
+- Operations: SubNibbles, ShiftRows, MixColumns, AddRoundKey
+- Key expansion for round keys
+
+The Mini-AES structure follows the standard AES but with simplified parameters:
+- State is represented as a 2x2 nibble array
+- S-Box is reduced to 4-bit operations
+- MixColumns uses a simpler matrix in GF(2^4)
+
+This implementation includes both encryption and decryption capabilities.
+
+Limitations:
+- Simplified security compared to standard AES
+- Designed for educational purposes only
+- Not suitable for actual secure communications
+"""
+        about_text.insert(tk.INSERT, about_info)
+        about_text.config(state='disabled')
+    
+    def hex_to_state(self, hex_str):
+        """Convert hex string to state array"""
+        if len(hex_str) != 4:
+            raise ValueError("Hex string must be exactly 4 characters (16 bits)")
+        
+        # Convert hex string to list of nibbles
+        return [int(hex_str[i], 16) for i in range(4)]
+    
+    def process(self):
+        """Process encryption/decryption based on user input"""
+        try:
+            # Get input values
+            text_hex = self.text_input.get().upper()
+            key_hex = self.key_input.get().upper()
+            
+            # Validate input
+            if len(text_hex) != 4 or len(key_hex) != 4:
+                raise ValueError("Input and key must be exactly 4 hex digits (16 bits)")
+            
+            # Convert to state arrays
+            text_state = self.hex_to_state(text_hex)
+            key_state = self.hex_to_state(key_hex)
+            
+            # Process based on selected operation
+            if self.operation.get() == "encrypt":
+                result = self.mini_aes.encrypt(text_state, key_state)
+            else:
+                result = self.mini_aes.decrypt(text_state, key_state)
+            
+            # Display result
+            result_hex = ''.join(f'{nibble:X}' for nibble in result)
+            self.result_text.config(state='normal')
+            self.result_text.delete(0, tk.END)
+            self.result_text.insert(0, result_hex)
+            self.result_text.config(state='readonly')
+            
+            # Display log
+            self.log_area.delete(1.0, tk.END)
+            self.log_area.insert(tk.INSERT, self.mini_aes.get_log())
+            
+        except Exception as e:
+            self.log_area.delete(1.0, tk.END)
+            self.log_area.insert(tk.INSERT, f"Error: {str(e)}")
+    
+    def run_test_case(self, case_index):
+        """Run a predefined test case and check it against the expected ciphertext"""
+        if case_index < len(TEST_VECTORS):
+            plaintext, key, expected = TEST_VECTORS[case_index]
+            self.text_input.delete(0, tk.END)
+            self.text_input.insert(0, f"{plaintext:04X}")
+            self.key_input.delete(0, tk.END)
+            self.key_input.insert(0, f"{key:04X}")
+            self.operation.set("encrypt")
+            self.process()
+            
+            result = self.result_text.get()
+            status = "PASS" if result == f"{expected:04X}" else "FAIL"
+            self.log_area.insert(tk.END, f"\n\nExpected Ciphertext: {expected:04X} ({status})")
+
+
+def main():
+    """Create and start the GUI"""
+    root = tk.Tk()
+    app = MiniAESApp(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
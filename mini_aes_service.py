@@ -0,0 +1,457 @@
+"""
+Asyncio Mini-AES encryption service with request batching.
+
+The server listens on TCP or a Unix socket and speaks a length-prefixed
+binary protocol (all integers big-endian):
+
+    frame    = length:u32 payload
+    request  = id:u32 op:u8 flags:u8 key:u16 iv:u16 data
+    response = id:u32 status:u8 data
+
+op bit 0 selects decryption and bit 1 CBC (clear: ECB); flags bit 0 enables
+PKCS#7 padding. status is 0 with the result in data, or 1 with a UTF-8
+error message. Requests on one connection may be pipelined and responses
+carry the request id, so they can arrive out of order.
+
+Small requests from all connections are coalesced: the batcher takes what
+is queued (waiting at most batch_delay for more), then encrypts the whole
+batch with the multi-key NumPy kernels in an executor thread, so the event
+loop never runs cipher code. Large requests go through StreamCipher on
+their own. The request queue is bounded and every connection has a limit
+on requests in flight; when either is full the server stops reading from
+the socket, and responses are written with drain(), so slow clients and
+overload push back instead of growing memory.
+
+    python mini_aes_service.py --port 8765
+    python mini_aes_service.py --unix /tmp/mini_aes.sock
+"""
+import asyncio
+import os
+import struct
+import sys
+
+import numpy as np
+
+from mini_aes import StreamCipher, as_blocks, decrypt_multi_key, encrypt_multi_key
+
+FRAME = struct.Struct('>I')
+REQUEST = struct.Struct('>IBBHH')
+RESPONSE = struct.Struct('>IB')
+
+OP_DECRYPT = 0x01
+OP_CBC = 0x02
+FLAG_PKCS7 = 0x01
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+MAX_FRAME = 16 * 1024 * 1024
+
+# Requests with more data than this bypass batching
+BATCH_MAX_BYTES = 4096
+
+
+class Request:
+    """One decoded request"""
+
+    __slots__ = ('id', 'decrypt', 'cbc', 'padding', 'key', 'iv', 'data')
+
+    def __init__(self, request_id, op, flags, key, iv, data):
+        self.id = request_id
+        self.decrypt = bool(op & OP_DECRYPT)
+        self.cbc = bool(op & OP_CBC)
+        self.padding = 'pkcs7' if flags & FLAG_PKCS7 else None
+        self.key = key
+        self.iv = iv
+        self.data = data
+
+    @classmethod
+    def decode(cls, payload):
+        if len(payload) < REQUEST.size:
+            raise ValueError("Request is too short")
+        return cls(*REQUEST.unpack_from(payload), payload[REQUEST.size:])
+
+    @property
+    def mode(self):
+        return 'cbc' if self.cbc else 'ecb'
+
+
+def encode_request(request_id, data, key, decrypt=False, mode='ecb', iv=0, padding='pkcs7'):
+    """Encode a request frame"""
+    if mode not in ('ecb', 'cbc'):
+        raise ValueError(f"Unknown mode: {mode}")
+    op = (OP_DECRYPT if decrypt else 0) | (OP_CBC if mode == 'cbc' else 0)
+    flags = FLAG_PKCS7 if padding == 'pkcs7' else 0
+    payload = REQUEST.pack(request_id, op, flags, key, iv or 0) + bytes(data)
+    return FRAME.pack(len(payload)) + payload
+
+
+def encode_response(request_id, status, data):
+    """Encode a response frame"""
+    return FRAME.pack(RESPONSE.size + len(data)) + RESPONSE.pack(request_id, status) + data
+
+
+async def read_frame(reader):
+    """Read one frame payload, or return None at end of stream"""
+    try:
+        header = await reader.readexactly(FRAME.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise
+        return None
+    (length,) = FRAME.unpack(header)
+    if length > MAX_FRAME:
+        raise ValueError(f"Frame of {length} bytes exceeds the limit of {MAX_FRAME}")
+    return await reader.readexactly(length)
+
+
+def process_single(request):
+    """Process one request through StreamCipher (used for large requests)"""
+    cipher = StreamCipher(request.mode, request.key, request.iv, request.decrypt, request.padding)
+    return cipher.update(request.data) + cipher.finalize()
+
+
+def process_batch(requests):
+    """
+    Process a batch of small requests with vectorized multi-key kernels.
+
+    ECB requests and CBC decryption are independent per block, so all their
+    blocks are concatenated with one key per block and run through one
+    elementwise encrypt_multi_key/decrypt_multi_key call per direction. CBC
+    encryption is sequential within a message, so those messages advance in
+    lockstep: step t encrypts block t of every CBC message at once.
+
+    Returns one bytes result or exception per request.
+    """
+    results = [None] * len(requests)
+    blocks = {}
+    for i, request in enumerate(requests):
+        try:
+            data = request.data
+            if not request.decrypt and request.padding == 'pkcs7':
+                pad = 2 - len(data) % 2
+                data += bytes([pad]) * pad
+            if len(data) % 2:
+                raise ValueError("Data length must be a multiple of 2 bytes (16 bits)")
+            blocks[i] = as_blocks(data)
+        except ValueError as e:
+            results[i] = e
+
+    def gather(indices, function):
+        if not indices:
+            return {}
+        data = np.concatenate([blocks[i] for i in indices])
+        keys = np.concatenate([np.full(blocks[i].size, requests[i].key, dtype=np.uint16)
+                               for i in indices])
+        output = function(data, keys, outer=False)
+        split = np.cumsum([blocks[i].size for i in indices])[:-1]
+        return dict(zip(indices, np.split(output, split)))
+
+    encrypt_ecb = [i for i in blocks if not requests[i].decrypt and not requests[i].cbc]
+    decrypt_any = [i for i in blocks if requests[i].decrypt]
+    encrypt_cbc = [i for i in blocks if not requests[i].decrypt and requests[i].cbc]
+
+    output = gather(encrypt_ecb, encrypt_multi_key)
+    output.update(gather(decrypt_any, decrypt_multi_key))
+
+    for i in decrypt_any:
+        if requests[i].cbc and blocks[i].size:
+            previous = np.concatenate([[requests[i].iv], blocks[i][:-1]]).astype(np.uint16)
+            output[i] = output[i] ^ previous
+
+    if encrypt_cbc:
+        length = max(blocks[i].size for i in encrypt_cbc)
+        plain = np.zeros((len(encrypt_cbc), length), dtype=np.uint16)
+        for row, i in enumerate(encrypt_cbc):
+            plain[row, :blocks[i].size] = blocks[i]
+        keys = np.array([requests[i].key for i in encrypt_cbc], dtype=np.uint16)
+        cipher = np.empty_like(plain)
+        chain = np.array([requests[i].iv for i in encrypt_cbc], dtype=np.uint16)
+        for t in range(length):
+            chain = encrypt_multi_key(plain[:, t] ^ chain, keys, out=cipher[:, t], outer=False)
+        for row, i in enumerate(encrypt_cbc):
+            output[i] = cipher[row, :blocks[i].size]
+
+    for i, data in output.items():
+        data = data.astype('>u2').tobytes()
+        if requests[i].decrypt and requests[i].padding == 'pkcs7':
+            pad = data[-1] if data else 0
+            if pad not in (1, 2) or data[-pad:] != bytes([pad]) * pad:
+                results[i] = ValueError("Invalid padding")
+                continue
+            data = data[:-pad]
+        results[i] = data
+    return results
+
+
+class MiniAESService:
+    """
+    The server. Call start_tcp() or start_unix(), then serve_forever() on the
+    returned asyncio server (or use it as an async context manager).
+    """
+
+    def __init__(self, executor=None, max_batch=256, batch_delay=0.0005, queue_size=1024,
+                 max_inflight=64, batch_max_bytes=BATCH_MAX_BYTES):
+        self.executor = executor
+        self.max_batch = max_batch
+        self.batch_delay = batch_delay
+        self.max_inflight = max_inflight
+        self.batch_max_bytes = batch_max_bytes
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batcher = None
+        self.servers = []
+        self.batches = 0
+        self.requests = 0
+
+    async def start_tcp(self, host='127.0.0.1', port=0):
+        """Listen on TCP; port 0 picks a free port (see server.sockets)"""
+        self.start_batcher()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.servers.append(server)
+        return server
+
+    async def start_unix(self, path):
+        """Listen on a Unix domain socket"""
+        self.start_batcher()
+        server = await asyncio.start_unix_server(self.handle_connection, path)
+        self.servers.append(server)
+        return server
+
+    def start_batcher(self):
+        if self.batcher is None:
+            self.batcher = asyncio.create_task(self.run_batcher())
+
+    async def close(self):
+        """Stop listening and stop the batcher"""
+        for server in self.servers:
+            server.close()
+            await server.wait_closed()
+        self.servers = []
+        if self.batcher is not None:
+            self.batcher.cancel()
+            try:
+                await self.batcher
+            except asyncio.CancelledError:
+                pass
+            self.batcher = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def run_batcher(self):
+        """Collect queued requests into batches and process them in the executor"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            if self.batch_delay:
+                deadline = loop.time() + self.batch_delay
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+            while len(batch) < self.max_batch and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            requests = [request for request, future in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, process_batch, requests)
+            except Exception as e:
+                results = [e] * len(batch)
+            self.batches += 1
+            self.requests += len(batch)
+            for (request, future), result in zip(batch, results):
+                if not future.done():
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+    async def submit(self, request):
+        """Run one request and return the result bytes"""
+        loop = asyncio.get_running_loop()
+        if len(request.data) > self.batch_max_bytes:
+            return await loop.run_in_executor(self.executor, process_single, request)
+        future = loop.create_future()
+        # Waits when the queue is full: this is where backpressure starts
+        await self.queue.put((request, future))
+        return await future
+
+    async def handle_connection(self, reader, writer):
+        inflight = asyncio.Semaphore(self.max_inflight)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(request):
+            try:
+                status, data = STATUS_OK, await self.submit(request)
+            except ValueError as e:
+                status, data = STATUS_ERROR, str(e).encode()
+            except Exception as e:
+                # A failed batch fails every request in it; answer each one
+                # instead of letting the error drop the connection
+                status, data = STATUS_ERROR, f"Internal error: {type(e).__name__}: {e}".encode()
+            try:
+                async with write_lock:
+                    writer.write(encode_response(request.id, status, data))
+                    await writer.drain()
+            except ConnectionError:
+                pass
+            finally:
+                inflight.release()
+
+        try:
+            while True:
+                # Stop reading while too many requests of this connection are in flight
+                await inflight.acquire()
+                payload = await read_frame(reader)
+                if payload is None:
+                    inflight.release()
+                    break
+                try:
+                    request = Request.decode(payload)
+                except ValueError as e:
+                    inflight.release()
+                    async with write_lock:
+                        writer.write(encode_response(0, STATUS_ERROR, str(e).encode()))
+                        await writer.drain()
+                    continue
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            for task in tasks:
+                task.cancel()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class MiniAESClient:
+    """
+    Client for MiniAESService. Requests can be issued concurrently from many
+    tasks over one connection; errors reported by the server raise ValueError.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.pending = {}
+        self.next_id = 1
+        self.write_lock = asyncio.Lock()
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect_tcp(cls, host='127.0.0.1', port=8765):
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path):
+        return cls(*await asyncio.open_unix_connection(path))
+
+    async def receive(self):
+        try:
+            while True:
+                payload = await read_frame(self.reader)
+                if payload is None:
+                    break
+                request_id, status = RESPONSE.unpack_from(payload)
+                future = self.pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                data = payload[RESPONSE.size:]
+                if status == STATUS_OK:
+                    future.set_result(data)
+                else:
+                    future.set_exception(ValueError(data.decode(errors='replace')))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            error = e
+        else:
+            error = ConnectionError("Connection closed by the server")
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+
+    async def request(self, data, key, decrypt=False, mode='ecb', iv=0, padding='pkcs7'):
+        """Send one request and wait for its result"""
+        request_id = self.next_id
+        self.next_id = (self.next_id + 1) & 0xFFFFFFFF or 1
+        frame = encode_request(request_id, data, key, decrypt, mode, iv, padding)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        async with self.write_lock:
+            self.writer.write(frame)
+            await self.writer.drain()
+        return await future
+
+    async def encrypt(self, data, key, mode='ecb', iv=0, padding='pkcs7'):
+        return await self.request(data, key, False, mode, iv, padding)
+
+    async def decrypt(self, data, key, mode='ecb', iv=0, padding='pkcs7'):
+        return await self.request(data, key, True, mode, iv, padding)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self.receiver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def serve(host='127.0.0.1', port=8765, unix_path=None, workers=None):
+    """Run the service until cancelled"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        service = MiniAESService(executor=executor)
+        if unix_path:
+            server = await service.start_unix(unix_path)
+        else:
+            server = await service.start_tcp(host, port)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Mini-AES service listening on {addresses}", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await service.close()
+
+
+def main(argv=None):
+    """Command line: start the service"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mini-AES encryption service")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('-w', '--workers', type=int, help="executor threads (default: one per CPU)")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Parametric Mini-AES variants compiled into lookup tables.
+
+A CipherSpec holds the parameters that MiniAES hard-codes: the S-box, the
+MixColumns matrix, the GF(2^4) reduction polynomial, the round constants
+and the number of rounds. The constructor validates them (the S-box must be
+a permutation, the polynomial irreducible and the matrix invertible over
+GF(2^4)) and derives the inverse S-box and inverse matrix.
+
+compile_spec() turns a spec into whole-state tables with the builder of the
+mini_aes batch API (BatchTables): SubNibbles, ShiftRows, MixColumns and
+their inverses, plus the fused round tables, so a round is one lookup and
+one XOR per block. The default spec reuses the batch API's own tables.
+Compiled specs are cached by the spec's hash, so sweeping many variants
+costs one table build per variant.
+
+    spec = CipherSpec(s_box=[0xE, 0x4, 0xD, 0x1, 0x2, 0xF, 0xB, 0x8,
+                             0x3, 0xA, 0x6, 0xC, 0x5, 0x9, 0x0, 0x7], rounds=4,
+                      rcon=(0x1, 0x2, 0x4, 0x8))
+    cipher = compile_spec(spec)
+    cipher.encrypt_block(0xA5B3, 0xC9D2)
+    cipher.encrypt_array(blocks, 0xC9D2)
+
+Round structure: the first round key is added, then rounds - 1 full rounds
+(SubNibbles, ShiftRows, MixColumns, AddRoundKey) and a final round without
+MixColumns, as in MiniAES.encrypt. The key schedule produces rounds + 1
+round keys: prev ^ SubNibbles(RotNibbles(prev)) ^ (rcon[i] << 12).
+"""
+import hashlib
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from mini_aes import (BatchTables, KeySchedule, MiniAES, as_blocks, batch_tables, block_to_int,
+                      key_to_int)
+
+
+def poly_mod(a, b):
+    """Remainder of the GF(2)[x] polynomial a divided by b (bit masks)"""
+    while a and a.bit_length() >= b.bit_length():
+        a ^= b << (a.bit_length() - b.bit_length())
+    return a
+
+
+def is_irreducible(polynomial):
+    """Whether a degree-4 polynomial over GF(2) has no factor of degree 1 or 2"""
+    return all(poly_mod(polynomial, factor) for factor in range(2, 8))
+
+
+def check_nibbles(values, name, count):
+    """Validate a sequence of count 4-bit values and return it as a tuple"""
+    try:
+        values = tuple(int(value) for value in values)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a sequence of integers")
+    if len(values) != count:
+        raise ValueError(f"{name} must have {count} entries")
+    if any(not 0 <= value <= 0xF for value in values):
+        raise ValueError(f"{name} entries must be 4-bit values (0-F)")
+    return values
+
+
+class CipherSpec:
+    """
+    Validated parameter set of a Mini-AES variant. Instances are immutable,
+    hashable and compare equal when their parameters are equal.
+
+    inv_s_box and inv_matrix are derived; when given they must match.
+    """
+
+    __slots__ = ('s_box', 'inv_s_box', 'matrix', 'inv_matrix', 'polynomial', 'rcon', 'rounds',
+                 'digest')
+
+    def __init__(self, s_box=MiniAES.S_BOX, matrix=MiniAES.MIX_COL_MATRIX,
+                 polynomial=MiniAES.POLYNOMIAL, rcon=KeySchedule.RCON, rounds=3,
+                 inv_s_box=None, inv_matrix=None):
+        s_box = check_nibbles(s_box, "S-box", 16)
+        if len(set(s_box)) != 16:
+            raise ValueError("S-box must be a permutation of 0-F (invertible)")
+        derived_inv_s_box = tuple(s_box.index(x) for x in range(16))
+        if inv_s_box is not None and check_nibbles(inv_s_box, "Inverse S-box", 16) != derived_inv_s_box:
+            raise ValueError("Inverse S-box does not invert the S-box")
+
+        if not isinstance(polynomial, int) or not 0x10 <= polynomial <= 0x1F:
+            raise ValueError("Polynomial must be a degree-4 bit mask (0x10-0x1F)")
+        if not is_irreducible(polynomial):
+            raise ValueError(f"Polynomial {polynomial:#x} is not irreducible over GF(2)")
+
+        try:
+            (a, b), (c, d) = matrix
+        except (TypeError, ValueError):
+            raise ValueError("Matrix must be 2x2")
+        a, b, c, d = check_nibbles((a, b, c, d), "Matrix", 4)
+
+        def times(x, y):
+            return MiniAES.gf_multiply(x, y, polynomial)
+
+        determinant = times(a, d) ^ times(b, c)
+        if not determinant:
+            raise ValueError("Matrix is not invertible over GF(2^4)")
+        # In characteristic 2 the adjugate needs no sign changes
+        inverse = next(x for x in range(1, 16) if times(determinant, x) == 1)
+        derived_inv_matrix = ((times(inverse, d), times(inverse, b)),
+                              (times(inverse, c), times(inverse, a)))
+        if inv_matrix is not None:
+            try:
+                (ia, ib), (ic, id_) = inv_matrix
+            except (TypeError, ValueError):
+                raise ValueError("Inverse matrix must be 2x2")
+            given = check_nibbles((ia, ib, ic, id_), "Inverse matrix", 4)
+            if given != derived_inv_matrix[0] + derived_inv_matrix[1]:
+                raise ValueError("Inverse matrix does not invert the matrix")
+
+        if not isinstance(rounds, int) or rounds < 1:
+            raise ValueError("Rounds must be a positive integer")
+        # One round constant per round key after the first
+        rcon = check_nibbles(rcon, "Round constants", rounds)
+
+        for name, value in (('s_box', s_box), ('inv_s_box', derived_inv_s_box),
+                            ('matrix', ((a, b), (c, d))), ('inv_matrix', derived_inv_matrix),
+                            ('polynomial', polynomial), ('rcon', rcon), ('rounds', rounds)):
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, 'digest', hashlib.sha256(repr(self.parameters()).encode()).hexdigest())
+
+    def parameters(self):
+        """The defining parameters as a dict (inverses are derived)"""
+        return {'s_box': self.s_box, 'matrix': self.matrix, 'polynomial': self.polynomial,
+                'rcon': self.rcon, 'rounds': self.rounds}
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CipherSpec is immutable")
+
+    def __repr__(self):
+        return f"CipherSpec({self.digest[:12]}, rounds={self.rounds})"
+
+    def __eq__(self, other):
+        return isinstance(other, CipherSpec) and other.digest == self.digest
+
+    def __hash__(self):
+        return hash(self.digest)
+
+
+# The parameters of MiniAES itself
+DEFAULT_SPEC = CipherSpec()
+
+
+class CompiledSpec:
+    """
+    The block operations of a CipherSpec, built on its BatchTables (tables),
+    each a 65,536-entry uint16 array over the whole state. Use
+    compile_spec() to get a cached instance.
+    """
+
+    def __init__(self, spec, tables=None):
+        self.spec = spec
+        if tables is None:
+            tables = BatchTables(spec.s_box, spec.matrix, spec.polynomial)
+        self.tables = tables
+
+        self.sub_nibbles = tables.sub_nibbles
+        self.inv_mix_columns = tables.inv_mix_columns
+        self.enc_round = tables.enc_round
+        self.enc_final = tables.enc_final
+        self.dec_round = tables.dec_round
+
+        # Compact copies for the single-block functions
+        self.enc_round_list = array('H', self.enc_round.tobytes())
+        self.enc_final_list = array('H', self.enc_final.tobytes())
+        self.dec_round_list = array('H', self.dec_round.tobytes())
+        self.inv_mix_list = array('H', self.inv_mix_columns.tobytes())
+        self.sub_list = array('H', self.sub_nibbles.tobytes())
+
+    def round_keys(self, key):
+        """The rounds + 1 round keys of a 16-bit key, as integers"""
+        round_keys = [key_to_int(key)]
+        for rcon in self.spec.rcon:
+            prev_key = round_keys[-1]
+            rotated = ((prev_key & 0xFF) << 8) | (prev_key >> 8)
+            round_keys.append(prev_key ^ self.sub_list[rotated] ^ (rcon << 12))
+        return tuple(round_keys)
+
+    def expand_keys(self, keys):
+        """Key expansion vectorized across keys: shape (rounds + 1,) + keys.shape"""
+        keys = as_blocks(keys)
+        round_keys = np.empty((self.spec.rounds + 1,) + keys.shape, dtype=np.uint16)
+        round_keys[0] = keys
+        for i, rcon in enumerate(self.spec.rcon):
+            prev_key = round_keys[i]
+            rotated = (prev_key << 8) | (prev_key >> 8)
+            round_keys[i + 1] = prev_key ^ self.sub_nibbles[rotated] ^ np.uint16(rcon << 12)
+        return round_keys
+
+    def encrypt_block(self, block, key):
+        """Encrypt a 16-bit integer block; key is a 16-bit key or a round_keys() tuple"""
+        round_keys = key if isinstance(key, tuple) else self.round_keys(key)
+        table = self.enc_round_list
+        state = block_to_int(block) ^ round_keys[0]
+        for round_key in round_keys[1:-1]:
+            state = table[state] ^ round_key
+        return self.enc_final_list[state] ^ round_keys[-1]
+
+    def decrypt_block(self, block, key):
+        """Decrypt a 16-bit integer block; key is a 16-bit key or a round_keys() tuple"""
+        round_keys = key if isinstance(key, tuple) else self.round_keys(key)
+        table = self.dec_round_list
+        inv_mix = self.inv_mix_list
+        state = block_to_int(block) ^ round_keys[-1]
+        for round_key in reversed(round_keys[1:-1]):
+            state = inv_mix[table[state] ^ round_key]
+        return table[state] ^ round_keys[0]
+
+    @staticmethod
+    def key_array(key):
+        """A NumPy array of keys as is, any other key as a 0-d uint16 array"""
+        if isinstance(key, np.ndarray):
+            return key
+        return np.array(key_to_int(key), dtype=np.uint16)
+
+    def encrypt_array(self, blocks, key):
+        """
+        Encrypt an array (or buffer) of blocks. key is a 16-bit key or a
+        NumPy array of keys broadcasting against the blocks.
+        """
+        blocks = as_blocks(blocks)
+        round_keys = self.expand_keys(self.key_array(key))
+        state = np.bitwise_xor(blocks, round_keys[0])
+        for round_key in round_keys[1:-1]:
+            np.take(self.enc_round, state, out=state)
+            np.bitwise_xor(state, round_key, out=state)
+        np.take(self.enc_final, state, out=state)
+        return np.bitwise_xor(state, round_keys[-1], out=state)
+
+    def decrypt_array(self, blocks, key):
+        """Decrypt an array of blocks; the inverse of encrypt_array"""
+        blocks = as_blocks(blocks)
+        round_keys = self.expand_keys(self.key_array(key))
+        state = np.bitwise_xor(blocks, round_keys[-1])
+        for round_key in round_keys[-2:0:-1]:
+            np.take(self.dec_round, state, out=state)
+            np.bitwise_xor(state, round_key, out=state)
+            np.take(self.inv_mix_columns, state, out=state)
+        np.take(self.dec_round, state, out=state)
+        return np.bitwise_xor(state, round_keys[0], out=state)
+
+    def codebook(self, key):
+        """The whole cipher under one key: encryption of all 65,536 blocks"""
+        return self.encrypt_array(np.arange(1 << 16, dtype=np.uint16), key)
+
+
+@lru_cache(maxsize=64)
+def compile_spec(spec=DEFAULT_SPEC):
+    """
+    Return the CompiledSpec of a spec. Results are cached by the spec's hash
+    (its digest), so equal specs share one set of tables. The default spec
+    uses the batch API's tables.
+    """
+    return CompiledSpec(spec, batch_tables() if spec == DEFAULT_SPEC else None)
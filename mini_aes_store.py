@@ -0,0 +1,196 @@
+"""
+Persistent, memory-mapped store of compiled Mini-AES codebooks.
+
+Every key's forward and inverse tables (65,536 uint16 entries each, 256 KiB
+per key) are written once to a file in the store directory and then opened
+with mmap by every process that needs them. The tables are read straight
+from the mapping through memoryview.cast('H'), so all processes share one
+page-cache copy and a new worker only has to open a file instead of
+recomputing the cipher.
+
+File layout (32-byte header, little-endian fields, then the tables in the
+byte order recorded in the header):
+
+    magic:8s version:u16 key:u16 byteorder:u16 reserved:u16 crc32:u32 pad:12
+    forward:65536*u16 inverse:65536*u16
+
+Files are written to a temporary file and renamed over the target, so
+readers never see a partial file. A file with a bad header or checksum is
+rebuilt. The store can be bounded by total size and by age; removing a file
+is safe while other processes still have it mapped.
+
+    store = CodebookStore('/var/cache/mini_aes')
+    mini_aes.codebook_cache.store = store     # or CodebookCache(store=store)
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+from mini_aes import Codebook, key_to_int
+
+MAGIC = b'MAESCB\x00\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sHHHHI12x')
+BYTEORDERS = {'little': 0, 'big': 1}
+
+TABLE_BYTES = Codebook.BLOCKS * 2
+FILE_SIZE = HEADER.size + 2 * TABLE_BYTES
+
+
+class CodebookStore:
+    """
+    Directory of codebook files, one per key.
+
+    max_bytes bounds the total size of the files and max_age (seconds) the
+    time since a file was last used; None disables a bound. max_bytes must
+    leave room for at least one file. verify checks the CRC-32 of a file the
+    first time this store opens it; a file replaced since (a new inode) is
+    checked again.
+    """
+
+    def __init__(self, directory, max_bytes=None, max_age=None, verify=True):
+        if max_bytes is not None and max_bytes < FILE_SIZE:
+            raise ValueError(f"max_bytes must be at least one codebook file ({FILE_SIZE} bytes)")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.verify = verify
+        # (key, inode) of the files whose checksum has been verified
+        self.verified = set()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """File name of the codebook of a key"""
+        return os.path.join(self.directory, f'codebook-{key_to_int(key):04X}.bin')
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key))
+
+    def keys(self):
+        """Keys with a codebook file in the store"""
+        keys = []
+        for name in os.listdir(self.directory):
+            if name.startswith('codebook-') and name.endswith('.bin'):
+                try:
+                    keys.append(int(name[9:-4], 16))
+                except ValueError:
+                    pass
+        return sorted(keys)
+
+    def get(self, key):
+        """
+        Return the memory-mapped codebook of a key, building and saving it
+        first if the store has no valid file for it
+        """
+        key = key_to_int(key)
+        codebook = self.load(key)
+        if codebook is None:
+            codebook = Codebook.build(key)
+            self.save(codebook)
+            self.evict(keep=key)
+            # Prefer the mapping, shared with other processes; keep the built
+            # codebook if the file was removed or replaced meanwhile
+            codebook = self.load(key) or codebook
+        return codebook
+
+    def load(self, key):
+        """Open the codebook file of a key; None if it is missing or invalid"""
+        key = key_to_int(key)
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # ValueError: empty file, which cannot be mapped
+            return None
+
+        if len(mapping) != FILE_SIZE:
+            mapping.close()
+            return None
+        magic, version, file_key, byteorder, _, checksum = HEADER.unpack_from(mapping)
+        if (magic != MAGIC or version != VERSION or file_key != key
+                or byteorder != BYTEORDERS[sys.byteorder]):
+            mapping.close()
+            return None
+        if self.verify and (key, inode) not in self.verified:
+            if zlib.crc32(memoryview(mapping)[HEADER.size:]) != checksum:
+                mapping.close()
+                return None
+            self.verified.add((key, inode))
+
+        # Mark the file as used for the age-based eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        view = memoryview(mapping)
+        forward = view[HEADER.size:HEADER.size + TABLE_BYTES].cast('H')
+        inverse = view[HEADER.size + TABLE_BYTES:].cast('H')
+        return Codebook(key, forward, inverse)
+
+    def save(self, codebook):
+        """Write a codebook file atomically (temporary file, then rename)"""
+        tables = bytes(codebook.forward) + bytes(codebook.inverse)
+        header = HEADER.pack(MAGIC, VERSION, codebook.key, BYTEORDERS[sys.byteorder], 0,
+                             zlib.crc32(tables))
+        fd, temp_path = tempfile.mkstemp(prefix='.codebook-', suffix='.tmp', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(tables)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path(codebook.key))
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def evict(self, keep=None):
+        """
+        Remove files older than max_age, then the least recently used files
+        until the store fits in max_bytes. The file of key keep (one just
+        written) is never removed. Returns the keys removed.
+        """
+        entries = []
+        for key in self.keys():
+            try:
+                stat = os.stat(self.path(key))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, key))
+        entries.sort()
+
+        removed = []
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, key in entries:
+            if key == keep:
+                continue
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed.append(key)
+        return removed
+
+    def clear(self):
+        """Remove every codebook file"""
+        for key in self.keys():
+            try:
+                os.unlink(self.path(key))
+            except FileNotFoundError:
+                pass
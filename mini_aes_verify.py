@@ -0,0 +1,355 @@
+"""
+Exhaustive self-verification of the Mini-AES engines.
+
+Sweeps every (key, plaintext) pair, 2^32 in total, one key at a time: under
+a key the whole cipher is a 65,536-entry codebook, so each engine can be run
+over all plaintexts with a few array operations. For every key the sweep
+checks that
+
+  * the batch engines agree: encrypt_blocks with every backend, the
+    multi-key kernel and Codebook.build produce the same codebook;
+  * every batch engine decrypts that codebook back to all 65,536 plaintexts
+    (round trip, which also proves the codebook is a permutation);
+  * the reference MiniAES.encrypt/decrypt and the scalar fast paths
+    (encrypt_block, decrypt_block, the T-table engine) agree with it on a
+    sample of plaintexts. The reference is pure Python, so checking it on
+    every pair would take days; --reference-samples 65536 does so anyway.
+
+Keys are split into shards that run on a process pool. Finished shards are
+recorded in a JSON checkpoint after each one completes, so an interrupted
+sweep resumes where it stopped.
+
+    python mini_aes_verify.py --workers 8 --checkpoint verify.json
+    python mini_aes_verify.py --keys 0:256 --engines table,multi_key
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from mini_aes import (BLOCK_BACKENDS, TEST_VECTORS, TRACE_OFF, Codebook, MiniAES, decrypt_block,
+                      decrypt_block_ttable, decrypt_blocks, decrypt_multi_key, encrypt_block,
+                      encrypt_block_ttable, encrypt_blocks, encrypt_multi_key, key_schedule,
+                      pack_state, unpack_state)
+
+ALL_BLOCKS = np.arange(1 << 16, dtype=np.uint16)
+ALL_KEYS = 1 << 16
+
+# Batch engines compared over every plaintext; the 'table' backend is the
+# codebook the others are compared against
+ENGINES = BLOCK_BACKENDS + ('multi_key', 'codebook')
+
+DEFAULT_SHARD_SIZE = 256
+DEFAULT_REFERENCE_SAMPLES = 16
+
+# Keys passed to the multi-key kernel at once (16 keys: 2 MiB per table)
+MULTI_KEY_GROUP = 16
+
+# Mismatches kept per shard and in the checkpoint
+MAX_MISMATCHES = 20
+
+
+def parse_engines(text):
+    """Parse a comma-separated list of engine names"""
+    engines = tuple(name.strip() for name in text.split(',') if name.strip())
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown or 'table' not in engines:
+        raise ValueError(f"Engines must include table and be among {', '.join(ENGINES)}")
+    return engines
+
+
+def parse_key_range(text):
+    """Parse START:END (hex with 0x prefix or decimal, END exclusive) into a range"""
+    try:
+        start, stop = (int(part, 0) for part in text.split(':'))
+    except ValueError:
+        raise ValueError(f"Invalid key range: {text!r} (expected START:END)")
+    if not 0 <= start < stop <= ALL_KEYS:
+        raise ValueError(f"Key range must lie within 0:{ALL_KEYS} and not be empty")
+    return range(start, stop)
+
+
+def check_test_vectors():
+    """Check the known-answer vectors with every engine; returns the mismatches"""
+    reference = MiniAES(trace=TRACE_OFF)
+    mismatches = []
+    for plaintext, key, ciphertext in TEST_VECTORS:
+        results = {
+            'MiniAES.encrypt': pack_state(reference.encrypt(unpack_state(plaintext), unpack_state(key))),
+            'encrypt_block': encrypt_block(plaintext, key),
+            'encrypt_block_ttable': encrypt_block_ttable(plaintext, key),
+        }
+        for backend in BLOCK_BACKENDS:
+            results[f'encrypt_blocks[{backend}]'] = int(encrypt_blocks(np.array([plaintext], dtype=np.uint16), key, backend)[0])
+        for engine, result in results.items():
+            if result != ciphertext:
+                mismatches.append(f"{engine}: key {key:04X}, plaintext {plaintext:04X}: "
+                                  f"{result:04X} != expected {ciphertext:04X}")
+    return mismatches
+
+
+def verify_keys(start, stop, engines=ENGINES, reference_samples=DEFAULT_REFERENCE_SAMPLES):
+    """
+    Verify every plaintext under the keys start..stop-1.
+
+    Returns (checks, mismatches) where checks is the number of individual
+    comparisons made and mismatches a list of descriptions (at most
+    MAX_MISMATCHES).
+    """
+    reference = MiniAES(trace=TRACE_OFF)
+    checks = 0
+    mismatches = []
+
+    def compare(engine, key, inputs, results, expected):
+        nonlocal checks
+        checks += expected.size
+        bad = np.flatnonzero(results != expected)
+        for index in bad[:MAX_MISMATCHES - len(mismatches)].tolist():
+            mismatches.append(f"{engine}: key {key:04X}, input {int(inputs[index]):04X}: "
+                              f"{int(results[index]):04X} != {int(expected[index]):04X}")
+
+    for group_start in range(start, stop, MULTI_KEY_GROUP):
+        keys = np.arange(group_start, min(group_start + MULTI_KEY_GROUP, stop)).astype(np.uint16)
+        if 'multi_key' in engines:
+            multi_forward = encrypt_multi_key(ALL_BLOCKS, keys, outer=True)
+            multi_inverse = decrypt_multi_key(multi_forward, keys[:, None], outer=False)
+
+        for row, key in enumerate(keys.tolist()):
+            schedule = key_schedule(key)
+            forward = encrypt_blocks(ALL_BLOCKS, schedule)
+            compare('decrypt_blocks[table]', key, forward, decrypt_blocks(forward, schedule), ALL_BLOCKS)
+
+            for engine in engines:
+                if engine == 'multi_key':
+                    compare('encrypt_multi_key', key, ALL_BLOCKS, multi_forward[row], forward)
+                    compare('decrypt_multi_key', key, forward, multi_inverse[row], ALL_BLOCKS)
+                elif engine == 'codebook':
+                    codebook = Codebook.build(schedule)
+                    compare('Codebook.forward', key, ALL_BLOCKS,
+                            np.frombuffer(codebook.forward, dtype=np.uint16), forward)
+                    compare('Codebook.inverse', key, forward,
+                            np.frombuffer(codebook.inverse, dtype=np.uint16)[forward], ALL_BLOCKS)
+                elif engine != 'table':
+                    compare(f'encrypt_blocks[{engine}]', key, ALL_BLOCKS,
+                            encrypt_blocks(ALL_BLOCKS, schedule, engine), forward)
+                    compare(f'decrypt_blocks[{engine}]', key, forward,
+                            decrypt_blocks(forward, schedule, engine), ALL_BLOCKS)
+
+            if reference_samples:
+                # A different spread of plaintexts for every key
+                samples = np.random.default_rng(key).permutation(ALL_BLOCKS)[:reference_samples]
+                scalar = {name: np.empty(samples.size, dtype=np.uint16) for name in (
+                    'MiniAES.encrypt', 'MiniAES.decrypt', 'encrypt_block', 'decrypt_block',
+                    'encrypt_block_ttable', 'decrypt_block_ttable')}
+                # The reference expands the key itself, independently of schedule
+                key_state = unpack_state(key)
+                for index, block in enumerate(samples.tolist()):
+                    state = unpack_state(block)
+                    ciphertext = int(forward[block])
+                    scalar['MiniAES.encrypt'][index] = pack_state(reference.encrypt(state, key_state))
+                    scalar['MiniAES.decrypt'][index] = pack_state(
+                        reference.decrypt(unpack_state(ciphertext), key_state))
+                    scalar['encrypt_block'][index] = encrypt_block(block, schedule)
+                    scalar['decrypt_block'][index] = decrypt_block(ciphertext, schedule)
+                    scalar['encrypt_block_ttable'][index] = encrypt_block_ttable(block, schedule)
+                    scalar['decrypt_block_ttable'][index] = decrypt_block_ttable(ciphertext, schedule)
+                for name, results in scalar.items():
+                    if 'encrypt' in name:
+                        compare(name, key, samples, results, forward[samples])
+                    else:
+                        compare(name, key, forward[samples], results, samples)
+    return checks, mismatches
+
+
+def verify_shard(shard, shard_size, keys, engines, reference_samples):
+    """Worker entry point: verify one shard of the key range"""
+    start = keys.start + shard * shard_size
+    stop = min(start + shard_size, keys.stop)
+    return (shard,) + verify_keys(start, stop, engines, reference_samples)
+
+
+class Checkpoint:
+    """
+    Progress of a sweep, saved as JSON. The settings must match for a sweep
+    to resume from it.
+    """
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.done = set()
+        self.pairs = 0
+        self.checks = 0
+        self.seconds = 0.0
+        self.mismatches = []
+
+    @classmethod
+    def load(cls, path, settings, restart=False):
+        """Open a checkpoint; a missing file (or restart) starts a new sweep"""
+        checkpoint = cls(path, settings)
+        if path is None or restart or not os.path.exists(path):
+            return checkpoint
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get('settings') != settings:
+            raise ValueError(f"Checkpoint {path} was written with different settings "
+                             f"({saved.get('settings')}); use --restart to discard it")
+        checkpoint.done = set(saved['done'])
+        checkpoint.pairs = saved['pairs']
+        checkpoint.checks = saved['checks']
+        checkpoint.seconds = saved['seconds']
+        checkpoint.mismatches = saved['mismatches']
+        return checkpoint
+
+    def record(self, shard, pairs, checks, mismatches):
+        self.done.add(shard)
+        self.pairs += pairs
+        self.checks += checks
+        self.mismatches.extend(mismatches[:MAX_MISMATCHES - len(self.mismatches)])
+
+    def save(self, seconds):
+        """Write the checkpoint atomically (temporary file, then rename)"""
+        if self.path is None:
+            return
+        data = {
+            'settings': self.settings,
+            'done': sorted(self.done),
+            'pairs': self.pairs,
+            'checks': self.checks,
+            'seconds': self.seconds + seconds,
+            'mismatches': self.mismatches,
+        }
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS"""
+    seconds = int(seconds)
+    return f'{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+
+
+def sweep(keys=range(ALL_KEYS), shard_size=DEFAULT_SHARD_SIZE, engines=ENGINES,
+          reference_samples=DEFAULT_REFERENCE_SAMPLES, workers=None, checkpoint=None,
+          restart=False, progress=None):
+    """
+    Verify every plaintext under every key in keys, sharded over a process
+    pool (workers=None: one per CPU). progress, if given, is called with a
+    status line after each shard. Returns the Checkpoint holding the totals.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+    if shard_size <= 0:
+        raise ValueError("Shard size must be positive")
+    settings = {
+        'keys': [keys.start, keys.stop],
+        'shard_size': shard_size,
+        'engines': list(engines),
+        'reference_samples': reference_samples,
+    }
+    state = Checkpoint.load(checkpoint, settings, restart)
+    shards = [shard for shard in range(-(-len(keys) // shard_size)) if shard not in state.done]
+    total_pairs = len(keys) << 16
+    workers = workers if workers is not None else os.cpu_count() or 1
+    start = time.perf_counter()
+    pairs_at_start = state.pairs
+
+    def report(shard):
+        elapsed = time.perf_counter() - start
+        rate = (state.pairs - pairs_at_start) / elapsed if elapsed else 0.0
+        remaining = (total_pairs - state.pairs) / rate if rate else 0.0
+        progress(f"shard {shard}: {state.pairs / total_pairs:7.2%} of {total_pairs} pairs, "
+                 f"{rate / 1e6:.2f} M pairs/s, ETA {format_duration(remaining)}, "
+                 f"{len(state.mismatches)} mismatch(es)")
+
+    def finish(result):
+        shard, checks, mismatches = result
+        shard_keys = min(shard_size, len(keys) - shard * shard_size)
+        state.record(shard, shard_keys << 16, checks, mismatches)
+        state.save(time.perf_counter() - start)
+        if progress is not None:
+            report(shard)
+
+    args = (shard_size, keys, tuple(engines), reference_samples)
+    if workers <= 1:
+        for shard in shards:
+            finish(verify_shard(shard, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep a bounded number of shards in flight so the checkpoint
+            # follows the completed work closely
+            pending = set()
+            queue = iter(shards)
+            for shard in queue:
+                pending.add(executor.submit(verify_shard, shard, *args))
+                if len(pending) >= 2 * workers:
+                    break
+            while pending:
+                completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    finish(future.result())
+                    shard = next(queue, None)
+                    if shard is not None:
+                        pending.add(executor.submit(verify_shard, shard, *args))
+    state.seconds += time.perf_counter() - start
+    return state
+
+
+def main(argv=None):
+    """Command line: run the sweep and print a summary; exits 1 on any mismatch"""
+    import argparse
+
+    parser = argparse.ArgumentParser(prog='python -m mini_aes verify',
+                                     description="Exhaustive Mini-AES self-verification")
+    parser.add_argument('--keys', default=f'0:{ALL_KEYS}',
+                        help=f"key range START:END, END exclusive (default: 0:{ALL_KEYS})")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f"keys per shard (default: {DEFAULT_SHARD_SIZE})")
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"batch engines to compare (default: {','.join(ENGINES)})")
+    parser.add_argument('--reference-samples', type=int, default=DEFAULT_REFERENCE_SAMPLES,
+                        help="plaintexts per key checked against the reference MiniAES "
+                             f"(default: {DEFAULT_REFERENCE_SAMPLES}, max: 65536)")
+    parser.add_argument('-w', '--workers', type=int,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--checkpoint', help="JSON file to save progress to and resume from")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore an existing checkpoint and start over")
+    args = parser.parse_args(argv)
+
+    try:
+        keys = parse_key_range(args.keys)
+        engines = parse_engines(args.engines)
+    except ValueError as e:
+        parser.error(str(e))
+    if not 0 <= args.reference_samples <= len(ALL_BLOCKS):
+        parser.error("--reference-samples must be between 0 and 65536")
+
+    mismatches = check_test_vectors()
+    print(f"Test vectors: {len(TEST_VECTORS)} checked, {len(mismatches)} mismatch(es)")
+    for mismatch in mismatches:
+        print(f"  {mismatch}")
+
+    try:
+        state = sweep(keys, args.shard_size, engines, args.reference_samples, args.workers,
+                      args.checkpoint, args.restart, progress=lambda line: print(line, flush=True))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    rate = state.pairs / state.seconds if state.seconds else 0.0
+    print(f"Verified {state.pairs} (key, plaintext) pairs with {state.checks} checks "
+          f"in {format_duration(state.seconds)} ({rate / 1e6:.2f} M pairs/s)")
+    for mismatch in state.mismatches:
+        print(f"  {mismatch}")
+    mismatches += state.mismatches
+    print("OK" if not mismatches else f"FAILED: {len(mismatches)} mismatch(es)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())